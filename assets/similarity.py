@@ -2,14 +2,19 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 def p(s, b, r):
-    return 1 - (1 - s ** b) ** r
+    return -np.expm1(r * np.log1p(-np.power(s, b)))
 
 s = np.linspace(0, 1, 500)
 
+B = np.array([8, 20, 20])
+R = np.array([14, 40, 450])
+LS = ["dotted", "dashed", "solid"]
+with np.errstate(divide='ignore'):
+    P = p(s[None, :], B[:, None], R[:, None])
+
 fig, ax = plt.subplots()
-ax.plot(s, p(s, 8, 14), ls="dotted", label='$b=8, r=14$')
-ax.plot(s, p(s, 20, 40), ls="dashed", label='$b=20, r=40$')
-ax.plot(s, p(s, 20, 450), ls="solid", label='$b=20, r=450$')
+for b, r, ls, y in zip(B, R, LS, P):
+    ax.plot(s, y, ls=ls, label=f'$b={b}, r={r}$')
 ax.set_xlabel('Jaccard coefficient ($s$)')
 ax.set_ylabel('Probability to be recognized as duplicates ($p$)')
 ax.grid()
@@ -2,33 +2,39 @@
 
 import sys
 import os
-import collections
+import numpy as np
 
 target = sys.argv[1]
 year = target[-4:]
 
-D = []
-begin = 0
+sizes = []
+srcs = []
 with open(f'{target}/CC-MAIN-{year}.src') as fi:
     for line in fi:
         fields = line.strip('\n').split('\t')
-        size = int(fields[0])
-        src = fields[1]
-        D.append(dict(begin=begin, size=size, src=src, flags=''))
-        begin += size
+        sizes.append(int(fields[0]))
+        srcs.append(fields[1])
+sizes = np.array(sizes, dtype=np.int64)
+begins = np.cumsum(sizes) - sizes
 
-with open(f'{target}/CC-MAIN-{year}.dup') as fi:
-    for d in D:
-        assert fi.tell() == d['begin']
-        d['flags'] = fi.read(d['size'])
-        assert len(d['flags']) == d['size']
-    assert fi.readline() == ''
+flags = np.fromfile(f'{target}/CC-MAIN-{year}.dup', dtype=np.uint8)
+assert flags.size == sizes.sum()
 
-data = collections.defaultdict(lambda: dict(total=0, active=0))
-for d in D:
-    date = os.path.basename(d['src'])[8:16]
-    data[date]['total'] += d['size']
-    data[date]['active'] += sum(1 for c in d['flags'] if c == ' ')
+# Count active items of each document; documents without items are skipped
+# because np.add.reduceat() cannot represent empty ranges.
+active = np.zeros(len(srcs), dtype=np.int64)
+nonempty = sizes > 0
+if nonempty.any():
+    active[nonempty] = np.add.reduceat(flags == 0x20, begins[nonempty], dtype=np.int64)
 
-for date, stat in data.items():
-    print(f'{date} {stat["active"]} {stat["total"]} {stat["active"] / stat["total"]}')
+# Aggregate the numbers of items by date (in the order of appearance).
+dates = np.array([os.path.basename(src)[8:16] for src in srcs])
+dates, first, idx = np.unique(dates, return_index=True, return_inverse=True)
+total_by_date = np.zeros(len(dates), dtype=np.int64)
+active_by_date = np.zeros(len(dates), dtype=np.int64)
+np.add.at(total_by_date, idx, sizes)
+np.add.at(active_by_date, idx, active)
+
+for j in np.argsort(first):
+    date, total, n = dates[j], int(total_by_date[j]), int(active_by_date[j])
+    print(f'{date} {n} {total} {n / total}')
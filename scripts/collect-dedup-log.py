@@ -1,7 +1,19 @@
 import sys
 import glob
+import mmap
+import os
 import re
-import json
+import concurrent.futures
+import orjson
+
+_RE = re.compile(rb'Result: (\{[^\n]*\})')
+
+def read_results(src):
+    # mmap cannot map an empty file.
+    if os.path.getsize(src) == 0:
+        return []
+    with open(src, 'rb') as fi, mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [orjson.loads(m.group(1)) for m in _RE.finditer(mm)]
 
 total_num_items = 0
 total_num_active_after = 0
@@ -10,17 +22,14 @@ total_time = 0
 prefix = sys.argv[1]
 
 srcs = glob.glob(f'{prefix}/*/CC-MAIN-*.log')
-for src in srcs:
-    m = re.match(f'{prefix}/([^/]+)/', src)
-    year = m.group(1)
-    with open(src) as fi:
-        for line in fi:
-            p = line.find('Result: {')
-            if p != -1:
-                result = json.loads(line[p+8:])
-                print(f'| {year} | {result["num_items"]:,} | {result["num_active_after"]:,} | {result["active_ratio_after"]} | {result["time"] / 3600:.3f} |')
-                total_num_items += result['num_items']
-                total_num_active_after += result['num_active_after']
-                total_time += result['time']
+with concurrent.futures.ThreadPoolExecutor() as executor:
+    for src, results in zip(srcs, executor.map(read_results, srcs)):
+        m = re.match(f'{prefix}/([^/]+)/', src)
+        year = m.group(1)
+        for result in results:
+            print(f'| {year} | {result["num_items"]:,} | {result["num_active_after"]:,} | {result["active_ratio_after"]} | {result["time"] / 3600:.3f} |')
+            total_num_items += result['num_items']
+            total_num_active_after += result['num_active_after']
+            total_time += result['time']
 
 print(f'| TOTAL | {total_num_items:,} | {total_num_active_after:,} | {total_num_active_after / total_num_items:.5f} | {total_time / 3600:.3f} |')
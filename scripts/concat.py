@@ -1,41 +1,33 @@
-import gzip
-import json
-import os
+import re
 import sys
+import orjson
+
+try:
+    # ISA-L provides a much faster drop-in replacement of the gzip module.
+    from isal import igzip as gzip
+except ImportError:
+    import gzip
+
+WRITE_LINES = 4096
+
+# Regular expressions to parse a CommonCrawl path.
+# See: "swallow-corpus-private/commoncrawl/generate-tasks.py"
+_PATH_RE = re.compile(r'^crawl-data/CC-MAIN-2[^/]*/segments/([^/]+)/warc/([^/]+)\.warc\.gz$')
+_OLD_RE = re.compile(r'^(CC-MAIN-\d{14})-(\d{5}-ip-\d+-\d+-\d+-.*\.internal)$')
 
 def ccpath2name(ccpath):
-    # See: "swallow-corpus-private/commoncrawl/generate-tasks.py"
-
-    fields = ccpath.split('/')
-    assert fields[0] == 'crawl-data'
-    archive = fields[1]
-    assert archive.startswith('CC-MAIN-2')
-    assert fields[2] == 'segments'
-    dirname = fields[3]
-    assert fields[4] == 'warc'
-    basename = fields[5]
-    assert basename.endswith('.warc.gz')
-    basename = basename.replace('.warc.gz', '')
-
-    if basename.endswith('.internal'):
+    m = _PATH_RE.match(ccpath)
+    assert m is not None
+    dirname, basename = m.groups()
+
+    m = _OLD_RE.match(basename)
+    if m is not None:
         # Old format.
-        values = basename.split('-')
-        assert values[0] == 'CC'
-        assert values[1] == 'MAIN'
-        assert len(values[2]) == 14
-        assert values[2].isdigit()
-        assert len(values[3]) == 5
-        assert values[3].isdigit()
-        assert values[4] == 'ip'
-        assert values[5].isdigit()
-        assert values[6].isdigit()
-        assert values[7].isdigit()
-        dst = '-'.join(values[:3] + [dirname,] + values[3:])
+        return f'{m.group(1)}-{dirname}-{m.group(2)}'
     else:
         # New format.
-        dst = basename
-    
-    return dst
+        assert not basename.endswith('.internal')
+        return basename
 
 # Create a mapping from filename to path.
 P = {}
@@ -43,18 +35,22 @@ with gzip.open(sys.argv[1], 'rt') as fi:
     for line in fi:
         ccpath = line.strip('\n')
         #print(ccpath, ccpath2name(ccpath))
-        P[ccpath2name(ccpath) + '.warc.gz'] = ccpath
+        P[ccpath2name(ccpath).encode() + b'.warc.gz'] = ccpath
 
-for line in sys.stdin:
-    src = line.strip('\n')
-    name = os.path.basename(src).replace('.jsonl.gz', '.warc.gz')
+for line in sys.stdin.buffer:
+    src = line.rstrip(b'\n')
+    name = src.rsplit(b'/', 1)[-1].replace(b'.jsonl.gz', b'.warc.gz')
     path = P.get(name)
     if path is None:
-        print(f'ERROR: Failed to retrieve a path from {name}', file=sys.stderr)
+        print(f'ERROR: Failed to retrieve a path from {name.decode()}', file=sys.stderr)
         sys.exit(1)
 
-    with gzip.open(src, 'rt') as fi:
+    with gzip.open(src, 'rb') as fi:
+        buf = []
         for line in fi:
-            d = dict(path=path)
-            d |= json.loads(line)
-            print(json.dumps(d, ensure_ascii=False))
+            d = {'path': path, **orjson.loads(line)}
+            buf.append(orjson.dumps(d, option=orjson.OPT_APPEND_NEWLINE))
+            if len(buf) >= WRITE_LINES:
+                sys.stdout.buffer.writelines(buf)
+                buf.clear()
+        sys.stdout.buffer.writelines(buf)
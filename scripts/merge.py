@@ -1,11 +1,17 @@
 #!/usr/bin/env python
 
+import asyncio
+import collections
 import os
 import sys
+import aioboto3
 
-SRC = 's3://swallow-corpus-cc/dedup'
+BUCKET = 'swallow-corpus-cc'
+PREFIX = 'dedup'
 WORK = '/data/dedup'
 R = 40
+CONCURRENCY = 32
+PREFETCH = 1
 
 SRCS = [
     'NINJAL/NINJAL',
@@ -24,49 +30,85 @@ SRCS = [
     '2025/CC-MAIN-2025',
     ]
 
-def exec(cmd):
+async def run(cmd):
     print(cmd)
-    os.system(cmd)
+    proc = await asyncio.create_subprocess_shell(cmd)
+    await proc.wait()
 
-# Copy duplication flags to the local storage.
-for src in SRCS:
-    dst = f'{WORK}/{src}.dup'
-    dstdir = os.path.dirname(dst)
+async def download(s3, sem, key, dst, size=None):
+    # Skip the file that has already been downloaded when the size is given.
+    if size is not None and os.path.exists(dst) and os.path.getsize(dst) == size:
+        return
+    async with sem:
+        print(f'download s3://{BUCKET}/{key} {dst}')
+        await s3.download_file(BUCKET, key, dst)
 
-    cmd = f'mkdir -p {dstdir}'
-    exec(cmd)
+async def list_objects(s3, prefix):
+    objs = []
+    paginator = s3.get_paginator('list_objects_v2')
+    async for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix):
+        objs += page.get('Contents', [])
+    return objs
 
-    cmd = f'aws s3 cp {SRC}/{src}.dup {dst}'
-    exec(cmd)
+async def fetch_indices(s3, sem, bn):
+    # Download the indices of the bucket number from all sources.
+    bstr = f'{bn:05d}'
+    O = await asyncio.gather(*[
+        list_objects(s3, f'{PREFIX}/{src}.idx.{bstr}.') for src in SRCS
+        ])
+    await asyncio.gather(*[
+        download(s3, sem, obj['Key'], f'{WORK}/{os.path.dirname(src)}/{os.path.basename(obj["Key"])}', obj['Size'])
+        for src, objs in zip(SRCS, O) for obj in objs
+        ])
 
-    cmd = f'cp {dst} {dst}.-----'
-    exec(cmd)
+async def main():
+    sem = asyncio.Semaphore(CONCURRENCY)
+    async with aioboto3.Session().client('s3') as s3:
+        # Copy duplication flags to the local storage.
+        for src in SRCS:
+            dst = f'{WORK}/{src}.dup'
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+        await asyncio.gather(*[
+            download(s3, sem, f'{PREFIX}/{src}.dup', f'{WORK}/{src}.dup')
+            for src in SRCS
+            ])
 
-# Merge indices for each bucket index
-for bn in range(R):
-    bstr = f'{bn:05d}'
+        for src in SRCS:
+            dst = f'{WORK}/{src}.dup'
+            cmd = f'cp {dst} {dst}.-----'
+            await run(cmd)
+
+        # Download the indices of the next PREFETCH bucket numbers while
+        # merging the indices of the current one; the local storage holds
+        # the indices of at most PREFETCH + 1 bucket numbers at a time.
+        fetches = collections.deque(
+            asyncio.create_task(fetch_indices(s3, sem, bn))
+            for bn in range(min(PREFETCH + 1, R))
+            )
+
+        # Merge indices for each bucket index
+        for bn in range(R):
+            bstr = f'{bn:05d}'
+            await fetches.popleft()
+
+            args = ' '.join([WORK + '/' + src for src in SRCS])
+            cmd = f'./build/doubri-merge -s {bn} -e {bn+1} -o {WORK}/merge.{bstr} -l info -L info {args}'
+            await run(cmd)
+
+            for src in SRCS:
+                dst = f'{WORK}/{src}.dup'
+                cmd = f'cp {dst}.merge {dst}'
+                await run(cmd)
+
+                cmd = f'mv {dst}.merge {dst}.{bstr}'
+                await run(cmd)
+
+                srcbase = os.path.basename(src)
+                dstdir = os.path.dirname(dst)
+                cmd = f'rm {dstdir}/{srcbase}.idx.{bstr}.*'
+                await run(cmd)
+
+            if bn + PREFETCH + 1 < R:
+                fetches.append(asyncio.create_task(fetch_indices(s3, sem, bn + PREFETCH + 1)))
 
-    for src in SRCS:
-        srcuri = f'{SRC}/{os.path.dirname(src)}/'
-        srcbase = os.path.basename(src)
-        dst = f'{WORK}/{src}.dup'
-        dstdir = os.path.dirname(dst)
-        cmd = f'aws s3 sync {srcuri} {dstdir}/ --exclude "*" --include "{srcbase}.idx.{bstr}.*" '
-        exec(cmd)
-
-    args = ' '.join([WORK + '/' + src for src in SRCS])
-    cmd = f'./build/doubri-merge -s {bn} -e {bn+1} -o {WORK}/merge.{bstr} -l info -L info {args}'
-    exec(cmd)
-
-    for src in SRCS:
-        dst = f'{WORK}/{src}.dup'
-        cmd = f'cp {dst}.merge {dst}'
-        exec(cmd)
-
-        cmd = f'mv {dst}.merge {dst}.{bstr}'
-        exec(cmd)
-
-        srcbase = os.path.basename(src)
-        dstdir = os.path.dirname(dst)
-        cmd = f'rm {dstdir}/{srcbase}.idx.{bstr}.*'
-        exec(cmd)
+asyncio.run(main())
@@ -1,27 +1,23 @@
 #!/usr/bin/env python
 
 import pandas as pd
-import json
+import orjson
 import os
 import sys
-import math
 
 G = int(sys.argv[1])
 S = 100
 dst = sys.argv[2]
 
 df = pd.read_csv('enron_spam_data.csv')
-df.fillna('')
+messages = df['Message'].fillna('').to_numpy()
 
-D = []
-for index, row in df.iterrows():
-    D.append(dict(
-        id=str(len(D)),
-        text=row['Message'] if not pd.isna(row['Message']) else '',
-    ))
+D = [dict(id=str(i), text=text) for i, text in enumerate(messages)]
 
+# Split the documents into G groups of ceil(len(D) / G) documents. Do not
+# change the group size: evaluate-*.py decode item IDs assuming it.
 datasets = [[] for g in range(G)]
-m = math.ceil(len(D) / G)
+m = -(-len(D) // G)
 for i in range(0, len(D), m):
     g = i // m
     datasets[g] = D[i:min(i+m, len(D))]
@@ -30,7 +26,6 @@ for i in range(0, len(D), m):
 for g, dataset in enumerate(datasets):
     for i in range(0, len(dataset), S):
         os.makedirs(f'{dst}/{g:02d}', exist_ok=True)
-        with open(f'{dst}/{g:02d}/{g:02d}-{i//S:05d}.jsonl', 'w') as fo:
+        with open(f'{dst}/{g:02d}/{g:02d}-{i//S:05d}.jsonl', 'wb') as fo:
             #print(i, i+S)
-            for d in dataset[i:min(i+S, len(dataset))]:
-                print(json.dumps(d), file=fo)
+            fo.write(b''.join(orjson.dumps(d, option=orjson.OPT_APPEND_NEWLINE) for d in dataset[i:min(i+S, len(dataset))]))
@@ -5,14 +5,34 @@ import sys
 import re
 import math
 import itertools
+import numpy as np
 
 def parse_id(s):
     values = s.split(':')
     return int(values[0]) * 8429 + int(values[1])
 
+def pack(x, y):
+    # Pack a pair of item IDs into a 64-bit integer key.
+    return (x << 32) | y
+
+def sweep(ref, S):
+    # For each similarity bucket of S (in order), count the pairs found in ref
+    # and the pairs of ref covered by the buckets so far.
+    sizes = np.array([len(keys) for _, keys in S], dtype=np.int64)
+    keys = np.concatenate([keys for _, keys in S])
+    ends = np.cumsum(sizes)
+    hit = np.isin(keys, ref)
+    hits = np.add.reduceat(hit.astype(np.int64), ends - sizes)
+
+    # Count each pair of ref only at its first (most similar) occurrence.
+    first = np.zeros(len(keys), dtype=bool)
+    first[np.unique(keys, return_index=True)[1]] = True
+    covered = np.cumsum(hit & first)[ends - 1]
+    return sizes, hits, covered
+
 dupkey = 'Duplicate(s): '
 
-D = set()
+D = []
 for line in sys.stdin:
     line = line.strip('\n')
     p = line.find(dupkey)
@@ -20,33 +40,23 @@ for line in sys.stdin:
         values = line[p+len(dupkey):].split(' ')
         ids = [parse_id(v) for v in values]
         for x, y in itertools.combinations(ids, 2):
-            D.add((x, y))
+            D.append(pack(x, y))
+D = np.unique(np.array(D, dtype=np.int64))
 
 S = collections.defaultdict(list)
 with open('enron_spam_data-sim.txt') as fi:
     for line in fi:
         fields = line.strip('\n').split(' ')
-        S[round(float(fields[0]), 2)].append((int(fields[1]), int(fields[2])))
-S = sorted(S.items(), key=lambda x: x[0], reverse=True)
+        S[round(float(fields[0]), 2)].append(pack(int(fields[1]), int(fields[2])))
+S = sorted(((sim, np.array(keys, dtype=np.int64)) for sim, keys in S.items()), key=lambda x: x[0], reverse=True)
 
+sizes, hits, covered = sweep(D, S)
 R = {}
-for sim, pairs in S:
-    n = 0
-    m = 0
-    for pair in pairs:
-        n += 1
-        if pair in D:
-            m += 1
-    R[sim] = dict(recall = m / n)
-
-P = set()
-for sim, pairs in S:
-    m = 0
-    P |= set(pairs)
-    for pair in D:
-        if pair in P:
-            m += 1
-    R[sim]['precision'] = m / len(D)
+for b, (sim, _) in enumerate(S):
+    R[sim] = dict(
+        recall = int(hits[b]) / int(sizes[b]),
+        precision = int(covered[b]) / len(D),
+        )
 
 for sim, stat in R.items():
     print(f"{sim:.2f} {stat['recall']} {stat['precision']}")
@@ -5,16 +5,39 @@ import sys
 import re
 import math
 import itertools
+import numpy as np
 
 def parse_id(s):
     values = s.split(':')
     return int(values[0]) * 8429 + int(values[1])
 
+def pack(x, y):
+    # Pack a pair of item IDs into a 64-bit integer key.
+    return (x << 32) | y
+
+def unpack(key):
+    return int(key >> 32), int(key & 0xFFFFFFFF)
+
+def sweep(ref, S):
+    # For each similarity bucket of S (in order), count the pairs found in ref
+    # and the pairs of ref covered by the buckets so far.
+    sizes = np.array([len(keys) for _, keys in S], dtype=np.int64)
+    keys = np.concatenate([keys for _, keys in S])
+    ends = np.cumsum(sizes)
+    hit = np.isin(keys, ref)
+    hits = np.add.reduceat(hit.astype(np.int64), ends - sizes)
+
+    # Count each pair of ref only at its first (most similar) occurrence.
+    first = np.zeros(len(keys), dtype=bool)
+    first[np.unique(keys, return_index=True)[1]] = True
+    covered = np.cumsum(hit & first)[ends - 1]
+    return sizes, hits, covered
+
 dupkey = 'Duplicate(s): '
 mergekey = 'Merge: '
 
 D = set()
-M = set()
+M = []
 for line in sys.stdin:
     line = line.strip('\n')
     p = line.find(dupkey)
@@ -28,7 +51,8 @@ for line in sys.stdin:
         values = line[p+len(mergekey):].split(' ')
         ids = [parse_id(v) for v in values]
         assert len(ids) == 2
-        M.add((ids[0], ids[1]))
+        M.append(pack(ids[0], ids[1]))
+M = np.unique(np.array(M, dtype=np.int64))
 
 S = collections.defaultdict(list)
 with open('enron_spam_data-sim.txt') as fi:
@@ -36,36 +60,25 @@ with open('enron_spam_data-sim.txt') as fi:
         fields = line.strip('\n').split(' ')
         x, y = int(fields[1]), int(fields[2])
         if x not in D and y not in D:
-            S[round(float(fields[0]), 2)].append((x, y))
-S = sorted(S.items(), key=lambda x: x[0], reverse=True)
+            S[round(float(fields[0]), 2)].append(pack(x, y))
+S = sorted(((sim, np.array(keys, dtype=np.int64)) for sim, keys in S.items()), key=lambda x: x[0], reverse=True)
 
+sizes, hits, covered = sweep(M, S)
 R = {}
-for sim, pairs in S:
-    n = 0
-    m = 0
-    for pair in pairs:
-        n += 1
-        if pair in M:
-            m += 1
-    R[sim] = dict(recall = m / n)
-
-P = set()
-for sim, pairs in S:
-    m = 0
-    P |= set(pairs)
-    for pair in M:
-        if pair in P:
-            m += 1
-    R[sim]['precision'] = m / len(D)
+for b, (sim, _) in enumerate(S):
+    R[sim] = dict(
+        recall = int(hits[b]) / int(sizes[b]),
+        precision = int(covered[b]) / len(D),
+        )
 
 for sim, stat in R.items():
     print(f"{sim:.2f} {stat['recall']} {stat['precision']}")
 
 
-for sim, pairs in S:
-    for pair in pairs:
-        if sim == 1.00 and pair not in M:
-            print(pair)
+for sim, keys in S:
+    if sim == 1.00:
+        for key in keys[~np.isin(keys, M)]:
+            print(unpack(key))
 #P = set()
 #for sim, pairs in S:
 #    P |= set(pairs)